@@ -1,7 +1,8 @@
 import json
 import re
 from pathlib import Path
-from utils.llm_api import LLM_API
+from utils.llm_api import LLM_API, GENERATION_ERROR_PREFIX
+from utils.results_store import ResultsStore, hash_prompt_template
 
 class Evaluator:
     """
@@ -9,13 +10,18 @@ class Evaluator:
     The methodology is inspired by the evaluation process in the MuSR repository's eval.py script.
    
     """
-    def __init__(self, llm_to_test: LLM_API):
+    SYSTEM_PROMPT = "You are a precise and logical German tax assistant."
+
+    def __init__(self, llm_to_test: LLM_API, results_store: ResultsStore | None = None):
         """
         Initializes the Evaluator with the specific LLM instance to be tested.
+        If a results store is given, already-scored cases are looked up instead of re-evaluated.
         """
         self.llm_to_test = llm_to_test
+        self.results_store = results_store
         with open("prompts/evaluation_prompt.txt", 'r', encoding='utf-8') as f:
             self.eval_prompt_template = f.read()
+        self.prompt_hash = hash_prompt_template(self.eval_prompt_template, self.SYSTEM_PROMPT)
 
     def evaluate_case_from_file(self, json_path: Path) -> dict:
         """
@@ -29,12 +35,22 @@ class Evaluator:
         question = case_data["generated_data"]["question"]
         ground_truth_answer = case_data["generated_data"]["ground_truth_answer"]["value_eur"]
 
+        store_key = (
+            case_data["case_id"], self.llm_to_test.model, self.prompt_hash,
+            self.llm_to_test.temperature, self.llm_to_test.max_tokens
+        )
+        if self.results_store:
+            stored_result = self.results_store.get(*store_key)
+            if stored_result is not None:
+                print("...[Evaluator] Case already scored for this model and prompt. Using stored result.")
+                return stored_result
+
         # 2. Construct the prompt with instructions/hint, similar to CoT+
         prompt = self.eval_prompt_template.format(narrative=narrative, question=question)
 
         # 3. Run inference to get the model's reasoning and answer
         print("...[Evaluator] Sending case to the LLM for evaluation...")
-        model_output = self.llm_to_test.generate(prompt, system_prompt="You are a precise and logical German tax assistant.")
+        model_output = self.llm_to_test.generate(prompt, system_prompt=self.SYSTEM_PROMPT)
         print("...[Evaluator] Received model's reasoning.")
 
         # 4. Parse the final answer from the model's output
@@ -46,13 +62,29 @@ class Evaluator:
             # Using a tolerance for floating point comparison
             is_correct = abs(parsed_answer - ground_truth_answer) < 0.01
 
-        return {
+        result = {
             "model_reasoning": model_output,
             "parsed_answer_eur": parsed_answer,
             "ground_truth_answer_eur": ground_truth_answer,
             "is_correct": is_correct
         }
 
+        # 6. Persist the result so this (case, model) pair is not scored again.
+        #    A failed model call is not an answer, so it is left unscored and retried next time.
+        if model_output.startswith(GENERATION_ERROR_PREFIX):
+            print("...[Evaluator] Model call failed. Result not stored.")
+        elif self.results_store:
+            tree = case_data["input_data"]["symbolic_reasoning_tree"]["root"]
+            self.results_store.save(*store_key, result, self._get_deduction_types(tree))
+        return result
+
+    def _get_deduction_types(self, node: dict) -> list:
+        """Collects the descriptions of all deduction facts in a serialized reasoning tree."""
+        deduction_types = [fact["description"] for fact in node["facts"] if fact["is_deduction"]]
+        for child in node["children"]:
+            deduction_types.extend(self._get_deduction_types(child))
+        return sorted(set(deduction_types))
+
     def _parse_final_answer(self, model_output: str) -> float | None:
         """
         Extracts the final numerical answer from the model's text output.
@@ -0,0 +1,100 @@
+import math
+import re
+from collections import Counter
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "had", "has", "have", "he", "her",
+    "his", "i", "in", "is", "it", "its", "my", "of", "on", "or", "she", "that", "the", "their", "they",
+    "this", "to", "was", "were", "with"
+}
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token), good enough for comparing prompt sizes."""
+    return (len(text) + 3) // 4
+
+class FactRetriever:
+    """
+    A local, sentence-level BM25 index over a single story. Built once per story, it lets each
+    fact check see only the few sentences that mention the fact instead of the whole narrative.
+    """
+    def __init__(self, story: str, top_k: int = 2, margin: int = 1, min_coverage: float = 0.5,
+                 k1: float = 1.5, b: float = 0.75):
+        self.story = story
+        self.top_k = top_k
+        self.margin = margin
+        self.min_coverage = min_coverage
+        self.k1 = k1
+        self.b = b
+
+        self.sentences = self._split_sentences(story)
+        self.sentence_tokens = [self._tokenize(s) for s in self.sentences]
+        self.term_freqs = [Counter(tokens) for tokens in self.sentence_tokens]
+        total_length = sum(len(t) for t in self.sentence_tokens)
+        # A story made only of stopwords has no indexed tokens; avoid dividing by a zero average.
+        self.avg_length = total_length / len(self.sentences) if total_length else 1
+        doc_freqs = Counter(term for tokens in self.sentence_tokens for term in set(tokens))
+        n = len(self.sentences)
+        self.idf = {term: math.log(1 + (n - df + 0.5) / (df + 0.5)) for term, df in doc_freqs.items()}
+
+    def retrieve(self, fact: str) -> tuple[str, bool]:
+        """
+        Returns the context to check the fact against and whether retrieval was used.
+        Falls back to the full story when the best passages do not cover enough of the fact's terms.
+        """
+        query = set(self._tokenize(fact))
+        if not query or not self.sentences:
+            return self.story, False
+
+        scores = [self._score(query, i) for i in range(len(self.sentences))]
+        ranked = sorted(range(len(scores)), key=lambda i: scores[i], reverse=True)[:self.top_k]
+        hits = [i for i in ranked if scores[i] > 0]
+        if not hits:
+            return self.story, False
+
+        selected = sorted({
+            j for i in hits
+            for j in range(max(0, i - self.margin), min(len(self.sentences), i + self.margin + 1))
+        })
+        covered = set().union(*(self.sentence_tokens[j] for j in selected))
+        if len(query & covered) / len(query) < self.min_coverage:
+            return self.story, False
+
+        # Contiguous sentences are joined back together; gaps are marked with an ellipsis.
+        passages, previous = [], None
+        for j in selected:
+            if previous is not None and j == previous + 1:
+                passages[-1] += " " + self.sentences[j]
+            else:
+                passages.append(self.sentences[j])
+            previous = j
+        return "\n...\n".join(passages), True
+
+    def _score(self, query: set, index: int) -> float:
+        """BM25 score of one sentence for the query terms."""
+        freqs = self.term_freqs[index]
+        length_norm = 1 - self.b + self.b * len(self.sentence_tokens[index]) / self.avg_length
+        score = 0.0
+        for term in query:
+            tf = freqs.get(term, 0)
+            if tf:
+                score += self.idf[term] * tf * (self.k1 + 1) / (tf + self.k1 * length_norm)
+        return score
+
+    def _split_sentences(self, text: str) -> list:
+        sentences = []
+        for paragraph in re.split(r"\n\s*\n", text):
+            sentences.extend(s.strip() for s in re.split(r"(?<=[.!?])\s+", paragraph) if s.strip())
+        return sentences
+
+    def _tokenize(self, text: str) -> list:
+        """Lowercases words and normalizes numbers so '57,445', '57445' and '57445.0' match."""
+        tokens = []
+        for token in re.findall(r"\d+(?:[.,]\d+)*|[a-zäöüß]+", text.lower()):
+            if token[0].isdigit():
+                token = re.sub(r"[.,](?=\d{3}(?!\d))", "", token).replace(",", ".")
+                if "." in token:
+                    token = token.rstrip("0").rstrip(".")
+            elif token in STOPWORDS or len(token) < 2:
+                continue
+            tokens.append(token)
+        return tokens
@@ -1,5 +1,7 @@
 import time
+from concurrent.futures import ThreadPoolExecutor
 from .data_structures import ReasoningTree, Fact, FactType
+from .fact_retriever import FactRetriever, estimate_tokens
 from utils.llm_api import LLM_API
 
 class StoryGenerator:
@@ -13,6 +15,7 @@ class StoryGenerator:
         self.chapter_prompt = self._load_prompt("chapter_prompt.txt")
         self.smoother_prompt = self._load_prompt("story_smoother_prompt.txt")
         self.rewrite_prompt = self._load_prompt("story_rewrite_prompt.txt")
+        self.recall_stats = {}
 
     def _load_prompt(self, filename: str) -> str:
         with open(f"prompts/{filename}", 'r', encoding='utf-8') as f:
@@ -36,21 +39,23 @@ class StoryGenerator:
 
     def _generate_chapters(self, reasoning_tree: ReasoningTree) -> (dict, list):
         """Generates a chapter for each main section of the reasoning tree."""
-        chapters = {}
         essential_facts = []
-        
-        intro_facts = self._get_facts_as_string(reasoning_tree.root)
-        chapters['introduction'] = self._create_chapter("introduction to the taxpayer", intro_facts)
+        chapter_keys = ['introduction']
+        titles = ["introduction to the taxpayer"]
+        facts = [self._get_facts_as_string(reasoning_tree.root)]
 
         for node in reasoning_tree.root.children:
-            node_facts = self._get_facts_as_string(node)
-            chapter_title = node.description.lower().replace(" ", "_")
-            chapters[chapter_title] = self._create_chapter(node.description, node_facts)
-            
+            chapter_keys.append(node.description.lower().replace(" ", "_"))
+            titles.append(node.description)
+            facts.append(self._get_facts_as_string(node))
+
             for fact in node.facts:
                 if fact.type == FactType.NARRATIVE or fact.is_deduction or fact.is_income:
                     essential_facts.append(f"{fact.description}: {fact.value}")
-        
+
+        # Chapters are independent, so backends that accept concurrent requests generate them together.
+        with ThreadPoolExecutor(max_workers=self.llm_api.concurrent_requests) as pool:
+            chapters = dict(zip(chapter_keys, pool.map(self._create_chapter, titles, facts)))
         return chapters, essential_facts
 
     def _create_chapter(self, title: str, facts: str) -> str:
@@ -68,18 +73,51 @@ class StoryGenerator:
         return self.llm_api.generate(prompt)
 
     def _validate_fact_recall(self, story: str, essential_facts: list) -> list:
-        """Checks if essential facts are present in the story."""
-        missing_facts = []
+        """
+        Checks if essential facts are present in the story. Each check only sees the
+        passages retrieved for its fact, falling back to the full story when retrieval is unsure.
+        """
+        retriever = FactRetriever(story)
+        story_tokens = estimate_tokens(story)
+        full_tokens, sent_tokens, fallbacks = 0, 0, 0
+        contexts = []
         for fact in essential_facts:
-            prompt = f"Read the story below.\n\nSTORY:\n{story}\n\nBased ONLY on the text of the story, does it support the following fact?\nFACT: '{fact}'\n\nAnswer with a single word: YES or NO."
-            response = self.llm_api.generate(prompt, system_prompt="You are a precise fact-checker.")
-            
-            print(f"  - Checking fact: \"{fact[:60]}...\" -> {'PRESENT' if 'yes' in response.lower() else 'MISSING'}")
-            if 'no' in response.lower():
-                missing_facts.append(fact)
-            time.sleep(1) # Avoid hitting API rate limits
+            context, trimmed = retriever.retrieve(fact)
+            full_tokens += story_tokens
+            sent_tokens += estimate_tokens(context)
+            fallbacks += not trimmed
+            contexts.append(context)
+
+        if self.llm_api.concurrent_requests > 1:
+            # The backend batches concurrent requests and has no rate limit to respect.
+            with ThreadPoolExecutor(max_workers=self.llm_api.concurrent_requests) as pool:
+                verdicts = list(pool.map(self._check_fact, essential_facts, contexts))
+        else:
+            verdicts = []
+            for fact, context in zip(essential_facts, contexts):
+                verdicts.append(self._check_fact(fact, context))
+                time.sleep(1) # Avoid hitting API rate limits
+        missing_facts = [fact for fact, supported in zip(essential_facts, verdicts) if not supported]
+
+        self.recall_stats = {
+            "facts_checked": len(essential_facts),
+            "full_story_fallbacks": fallbacks,
+            "story_tokens_full": full_tokens,
+            "story_tokens_sent": sent_tokens,
+            "prompt_tokens_saved": full_tokens - sent_tokens
+        }
+        print(f"...Fact-check context trimmed: ~{full_tokens - sent_tokens} prompt tokens saved "
+              f"({fallbacks}/{len(essential_facts)} checks fell back to the full story).")
         return missing_facts
 
+    def _check_fact(self, fact: str, context: str) -> bool:
+        """Asks the LLM whether the given story context supports a single fact."""
+        prompt = f"Read the story below.\n\nSTORY:\n{context}\n\nBased ONLY on the text of the story, does it support the following fact?\nFACT: '{fact}'\n\nAnswer with a single word: YES or NO."
+        response = self.llm_api.generate(prompt, system_prompt="You are a precise fact-checker.")
+
+        print(f"  - Checking fact: \"{fact[:60]}...\" -> {'PRESENT' if 'yes' in response.lower() else 'MISSING'}")
+        return 'no' not in response.lower()
+
     def _rewrite_story(self, draft_story: str, missing_facts: list) -> str:
         """Prompts the LLM to rewrite the story to include missing facts."""
         missing_facts_str = "\n".join([f"- {f}" for f in missing_facts])
@@ -1,15 +1,17 @@
 import argparse
 import importlib
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from core.scenario_sampler import ScenarioSampler
 from core.tree_completer import TreeCompleter
 from core.story_generator import StoryGenerator
 from core.reasoning_engine import ReasoningEngine
 from core.evaluator import Evaluator
-from utils.llm_api import LLM_API
+from utils.llm_api import create_llm_api
 from utils.file_handler import save_case_to_json
+from utils.results_store import ResultsStore
 
-def main(template_name: str, output_dir: str):
+def main(template_name: str, output_dir: str, results_db: str):
     """
     Main execution pipeline for the TaxGenius framework.
     Generates a synthetic case, saves it to JSON, and immediately evaluates it.
@@ -17,10 +19,13 @@ def main(template_name: str, output_dir: str):
     print(f"\n[[ TaxGenius: Initializing Generation & Evaluation for template: {template_name} ]]")
     print("-" * 70)
 
+    llm_api = None
+    results_store = None
     try:
         # --- Initialization ---
-        llm_api = LLM_API()
-        evaluator = Evaluator(llm_to_test=llm_api)
+        llm_api = create_llm_api()
+        results_store = ResultsStore(results_db)
+        evaluator = Evaluator(llm_to_test=llm_api, results_store=results_store)
         scenario_sampler = ScenarioSampler()
         tree_completer = TreeCompleter(llm_api, scenario_sampler)
         story_generator = StoryGenerator(llm_api)
@@ -51,7 +56,8 @@ def main(template_name: str, output_dir: str):
             story=final_story,
             taxable_income=taxable_income,
             total_deductions=total_deductions,
-            output_dir=output_dir
+            output_dir=output_dir,
+            recall_stats=story_generator.recall_stats
         )
         if not json_filepath:
             return
@@ -67,6 +73,11 @@ def main(template_name: str, output_dir: str):
     except Exception as e:
         print(f"\n[An unexpected error occurred]: {e}")
         return
+    finally:
+        if llm_api is not None:
+            llm_api.close()
+        if results_store is not None:
+            results_store.close()
 
     # --- Print Evaluation Results ---
     print("\n" + "=" * 70)
@@ -78,6 +89,63 @@ def main(template_name: str, output_dir: str):
     print(f"Model's Parsed Answer: €{parsed_answer:,.2f}" if parsed_answer is not None else "Model's Parsed Answer: [Could not parse answer]")
     print(f"\nResult: {'CORRECT' if evaluation_result['is_correct'] else 'INCORRECT'}")
     print("=" * 70)
+    print_backend_stats(llm_api)
+
+def print_backend_stats(llm_api):
+    """Prints request latency and batch-size statistics if the backend collects them."""
+    stats = llm_api.stats()
+    if not stats or not stats['requests']:
+        return
+    print(f"\nLocal backend: {stats['requests']} requests in {stats['batches']} batches "
+          f"(mean batch size {stats['mean_batch_size']:.2f}, largest batch {stats['largest_batch']}, "
+          f"p50 latency {stats['p50_latency_s']:.2f}s, p95 latency {stats['p95_latency_s']:.2f}s)")
+
+def evaluate_existing(output_dir: str, results_db: str):
+    """
+    Evaluates every saved case in the output directory with the configured model.
+    Cases already scored for this model, prompt and sampling settings are skipped.
+    """
+    print(f"\n[[ TaxGenius: Evaluating existing cases in '{output_dir}' ]]")
+    print("-" * 70)
+    llm_api = create_llm_api()
+    results_store = ResultsStore(results_db)
+    try:
+        evaluator = Evaluator(llm_to_test=llm_api, results_store=results_store)
+        json_filepaths = sorted(Path(output_dir).glob("*.json"))
+        # Cases are independent, so backends that accept concurrent requests evaluate them together.
+        with ThreadPoolExecutor(max_workers=llm_api.concurrent_requests) as pool:
+            evaluation_results = list(pool.map(evaluator.evaluate_case_from_file, json_filepaths))
+        print()
+        for json_filepath, evaluation_result in zip(json_filepaths, evaluation_results):
+            print(f"- {json_filepath.name}: {'CORRECT' if evaluation_result['is_correct'] else 'INCORRECT'}")
+    finally:
+        llm_api.close()
+        results_store.close()
+    print_backend_stats(llm_api)
+
+def report(results_db: str):
+    """Prints aggregate accuracy and error statistics from the results store."""
+    store = ResultsStore(results_db)
+    print("\n" + "=" * 70)
+    print("STORED EVALUATION RESULTS")
+    print("=" * 70)
+    print("\nAccuracy by model:")
+    for row in store.accuracy_by("model"):
+        print(f"  {row['model']:<40} {row['accuracy']:6.1%}  (n={row['n']})")
+    print("\nAccuracy by template and model:")
+    for row in store.accuracy_by("template", "model"):
+        print(f"  {row['template']:<32} {row['model']:<30} {row['accuracy']:6.1%}  (n={row['n']})")
+    print("\nAccuracy by prompt template:")
+    for row in store.accuracy_by("prompt_hash", "model"):
+        print(f"  {row['prompt_hash']:<20} {row['model']:<30} {row['accuracy']:6.1%}  (n={row['n']})")
+    print("\nAccuracy by deduction type:")
+    for row in store.accuracy_by_deduction_type():
+        print(f"  {row['deduction_type']:<40} {row['model']:<30} {row['accuracy']:6.1%}  (n={row['n']})")
+    print("\nAbsolute error distribution (EUR):")
+    for row in store.abs_error_distribution():
+        print(f"  {row['bucket']:<20} {row['n']}")
+    print("=" * 70)
+    store.close()
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(
@@ -100,5 +168,27 @@ if __name__ == "__main__":
         default='output',
         help="The directory where the final JSON case file will be saved.\n(default: output/)"
     )
+    parser.add_argument(
+        "--results_db",
+        type=str,
+        default='output/results.db',
+        help="SQLite file where evaluation results are stored and looked up.\n(default: output/results.db)"
+    )
+    parser.add_argument(
+        "--evaluate_existing",
+        action='store_true',
+        help="Evaluate all cases already saved in --output_dir instead of generating a new one.\n"
+             "Cases already scored for the configured model are skipped."
+    )
+    parser.add_argument(
+        "--report",
+        action='store_true',
+        help="Print aggregate accuracy and error statistics from --results_db and exit."
+    )
     args = parser.parse_args()
-    main(args.template, args.output_dir)
\ No newline at end of file
+    if args.report:
+        report(args.results_db)
+    elif args.evaluate_existing:
+        evaluate_existing(args.output_dir, args.results_db)
+    else:
+        main(args.template, args.output_dir, args.results_db)
\ No newline at end of file
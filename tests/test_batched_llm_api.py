@@ -0,0 +1,147 @@
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+import pytest
+import yaml
+from core.data_structures import Fact, FactType, ReasoningTree, ReasoningTreeNode
+from core.story_generator import StoryGenerator
+from utils.batched_llm_api import BatchedLLM_API
+from utils.results_store import ResultsStore
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Minimal OpenAI-compatible /chat/completions endpoint that echoes the user prompt."""
+    protocol_version = "HTTP/1.1"
+    delay_s = 0.1
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        prompt = body["messages"][1]["content"]
+        time.sleep(self.delay_s)
+        if prompt == "rate-limited":
+            status, payload = 429, {"error": {"message": "Rate limit reached"}}
+        else:
+            status, payload = 200, {"choices": [{"message": {"content": f" echo: {prompt} "}}]}
+        out = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(out)))
+        self.end_headers()
+        self.wfile.write(out)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def stub_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}/v1"
+    server.shutdown()
+    server.server_close()
+
+@pytest.fixture
+def make_api(stub_server, tmp_path):
+    apis = []
+
+    def _make(max_batch_size: int = 4, max_wait_ms: int = 200) -> BatchedLLM_API:
+        config = {"llm": {
+            "backend": "local", "model": "stub-model", "temperature": 0.0, "max_tokens": 16,
+            "local": {"base_url": stub_server, "max_batch_size": max_batch_size, "max_wait_ms": max_wait_ms}
+        }}
+        config_path = tmp_path / f"config_{len(apis)}.yaml"
+        config_path.write_text(yaml.safe_dump(config))
+        api = BatchedLLM_API(str(config_path))
+        apis.append(api)
+        return api
+
+    yield _make
+    for api in apis:
+        api.close()
+
+def generate_concurrently(api: BatchedLLM_API, prompts: list) -> list:
+    with ThreadPoolExecutor(max_workers=len(prompts)) as pool:
+        return list(pool.map(api.generate, prompts))
+
+def test_concurrent_requests_are_coalesced_and_answered_in_order(make_api):
+    api = make_api(max_batch_size=4)
+    prompts = [f"p{i}" for i in range(8)]
+    assert generate_concurrently(api, prompts) == [f"echo: {p}" for p in prompts]
+    stats = api.stats()
+    assert stats["requests"] == 8
+    assert stats["largest_batch"] > 1
+    assert stats["batches"] < 8
+
+def test_batches_never_exceed_max_batch_size(make_api):
+    api = make_api(max_batch_size=3)
+    generate_concurrently(api, [f"p{i}" for i in range(12)])
+    assert api.stats()["largest_batch"] == 3
+    assert all(size <= 3 for size in api._batch_sizes)
+
+def test_sequential_requests_skip_the_wait_window(make_api):
+    api = make_api(max_batch_size=4, max_wait_ms=2000)
+    start = time.perf_counter()
+    assert api.generate("one") == "echo: one"
+    assert api.generate("two") == "echo: two"
+    assert time.perf_counter() - start < 1.5
+    assert api._batch_sizes == [1, 1]
+
+def test_http_error_is_returned_as_error_string(make_api):
+    api = make_api()
+    result = api.generate("rate-limited")
+    assert result.startswith("Error: Could not generate content.")
+    assert "429" in result
+
+def test_stats_report_latency_and_batch_sizes(make_api):
+    api = make_api()
+    empty = api.stats()
+    assert empty["requests"] == 0 and empty["mean_batch_size"] is None
+    generate_concurrently(api, [f"p{i}" for i in range(4)])
+    stats = api.stats()
+    assert stats["requests"] == 4
+    assert sum(api._batch_sizes) == 4
+    assert stats["mean_batch_size"] == pytest.approx(4 / stats["batches"])
+    assert StubHandler.delay_s <= stats["p50_latency_s"] <= stats["p95_latency_s"] <= stats["max_latency_s"]
+
+def test_generate_after_close_returns_error_instead_of_hanging(make_api):
+    api = make_api()
+    assert api.generate("before") == "echo: before"
+    api.close()
+    api.close()  # closing twice is a no-op
+    start = time.perf_counter()
+    assert api.generate("after").startswith("Error: Could not generate content.")
+    assert time.perf_counter() - start < 1
+
+def test_evaluate_existing_batches_cases(make_api, tmp_path, monkeypatch, capsys):
+    import main
+    monkeypatch.chdir(REPO_ROOT)  # prompts/ is loaded relative to the repo root
+    api = make_api(max_batch_size=4)
+    monkeypatch.setattr(main, "create_llm_api", lambda: api)
+    main.evaluate_existing(str(REPO_ROOT / "output"), str(tmp_path / "results.db"))
+
+    cases = len(list((REPO_ROOT / "output").glob("*.json")))
+    assert api.stats()["requests"] == cases
+    assert api.stats()["largest_batch"] > 1
+    assert "Local backend:" in capsys.readouterr().out
+    store = ResultsStore(str(tmp_path / "results.db"))
+    assert sum(row["n"] for row in store.accuracy_by("model")) == cases
+    store.close()
+
+def test_chapters_are_generated_concurrently(make_api, monkeypatch):
+    monkeypatch.chdir(REPO_ROOT)
+    api = make_api(max_batch_size=4)
+    root = ReasoningTreeNode("root", facts=[Fact("Taxpayer Name", "Ben", FactType.NARRATIVE)])
+    root.children = [ReasoningTreeNode(f"Section {i}", facts=[Fact(f"Item {i}", i * 100, is_deduction=True)])
+                     for i in range(3)]
+    chapters, essential_facts = StoryGenerator(api)._generate_chapters(ReasoningTree(root))
+
+    assert list(chapters) == ["introduction", "section_0", "section_1", "section_2"]
+    assert all(chapter.startswith("echo: ") for chapter in chapters.values())
+    assert "Item 1" in chapters["section_1"]
+    assert essential_facts == ["Item 0: 0", "Item 1: 100", "Item 2: 200"]
+    assert api.stats()["largest_batch"] > 1
@@ -0,0 +1,53 @@
+from pathlib import Path
+import pytest
+from core.evaluator import Evaluator
+from utils.llm_api import GENERATION_ERROR_PREFIX
+from utils.results_store import ResultsStore
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+CASE_PATH = REPO_ROOT / "output" / "employee_commuter_case_20250924_221843.json"
+
+class StubLLM:
+    """Stands in for LLM_API: returns canned outputs and counts calls."""
+    model = "stub-model"
+    temperature = 0.7
+    max_tokens = 1024
+    concurrent_requests = 1
+
+    def __init__(self, outputs: list):
+        self.outputs = list(outputs)
+        self.calls = 0
+
+    def generate(self, prompt: str, system_prompt: str = "") -> str:
+        self.calls += 1
+        return self.outputs.pop(0)
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.chdir(REPO_ROOT)  # the evaluator loads prompts/ relative to the repo root
+    store = ResultsStore(str(tmp_path / "results.db"))
+    yield store
+    store.close()
+
+def test_scored_case_is_not_sent_to_the_model_again(store):
+    first = StubLLM(["ANSWER: €1,000.00"])
+    result = Evaluator(first, store).evaluate_case_from_file(CASE_PATH)
+    second = StubLLM([])
+    assert Evaluator(second, store).evaluate_case_from_file(CASE_PATH) == result
+    assert first.calls == 1 and second.calls == 0
+
+def test_failed_model_call_is_not_stored(store):
+    failing = StubLLM([f"{GENERATION_ERROR_PREFIX} Details: Error code: 429 - rate limit reached"])
+    result = Evaluator(failing, store).evaluate_case_from_file(CASE_PATH)
+    assert result["is_correct"] is False
+    assert store.accuracy_by("model") == []
+
+    retry = StubLLM(["ANSWER: €1,000.00"])
+    Evaluator(retry, store).evaluate_case_from_file(CASE_PATH)
+    assert retry.calls == 1
+    assert store.accuracy_by("model") == [{"model": "stub-model", "n": 1, "accuracy": 0.0}]
+
+def test_deduction_types_are_stored_with_the_result(store):
+    Evaluator(StubLLM(["no answer"]), store).evaluate_case_from_file(CASE_PATH)
+    assert [row["deduction_type"] for row in store.accuracy_by_deduction_type()] == ["Total Commute Deduction"]
+    assert store.abs_error_distribution() == [{"bucket": "unparsed", "n": 1}]
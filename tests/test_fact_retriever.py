@@ -0,0 +1,95 @@
+import json
+from pathlib import Path
+import pytest
+import core.story_generator
+from core.fact_retriever import FactRetriever, estimate_tokens
+from core.story_generator import StoryGenerator
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+STORED_CASES = sorted((REPO_ROOT / "output").glob("*.json"))
+
+STORY = (
+    "Ben works as a Marketing Manager in Munich. He enjoys cycling on weekends. "
+    "His gross annual salary is 57,445 euros. He drives 18 km to the office every day.\n\n"
+    "Lena lives across town. She likes coffee."
+)
+
+@pytest.mark.parametrize("text", ["57,445", "57.445", "57445.0", "57445", "€57,445.00"])
+def test_tokenize_normalizes_numbers(text):
+    assert FactRetriever("")._tokenize(text) == ["57445"]
+
+def test_tokenize_keeps_decimals_and_drops_stopwords():
+    assert FactRetriever("")._tokenize("The cost was 1,234.50 and 3.5") == ["cost", "1234.5", "3.5"]
+
+def test_retrieve_returns_matching_sentence_with_margin():
+    retriever = FactRetriever(STORY, top_k=1, margin=1)
+    context, trimmed = retriever.retrieve("Gross Annual Salary: 57445")
+    assert trimmed
+    assert context == (
+        "He enjoys cycling on weekends. His gross annual salary is 57,445 euros. "
+        "He drives 18 km to the office every day."
+    )
+    assert estimate_tokens(context) < estimate_tokens(STORY)
+
+def test_non_adjacent_passages_are_separated():
+    retriever = FactRetriever(STORY, top_k=2, margin=0)
+    context, trimmed = retriever.retrieve("Munich coffee")
+    assert trimmed
+    assert context == "Ben works as a Marketing Manager in Munich.\n...\nShe likes coffee."
+
+def test_low_coverage_falls_back_to_full_story():
+    retriever = FactRetriever(STORY)
+    # Only 'salary' matches; the amount and most other terms do not appear in the story.
+    assert retriever.retrieve("Private Health Insurance Premium Salary: 8299") == (STORY, False)
+
+def test_no_match_falls_back_to_full_story():
+    retriever = FactRetriever(STORY)
+    assert retriever.retrieve("Charitable Donation: 643") == (STORY, False)
+    assert FactRetriever("").retrieve("Salary: 1") == ("", False)
+    # Sentences exist but none has an indexed (non-stopword) token.
+    assert FactRetriever("It was. It is.").retrieve("Salary: 5") == ("It was. It is.", False)
+
+def collect_facts(node: dict) -> list:
+    facts = list(node["facts"])
+    for child in node["children"]:
+        facts.extend(collect_facts(child))
+    return facts
+
+class ValueOracleLLM:
+    """
+    Stub fact-checker: answers YES exactly when every token of the fact's value appears in
+    the story context it was given, which is what a faithful model would conclude.
+    """
+    concurrent_requests = 1
+
+    def __init__(self, values: dict):
+        self.values = values
+        self.tokenize = FactRetriever("")._tokenize
+
+    def generate(self, prompt: str, system_prompt: str = "") -> str:
+        context = prompt.split("STORY:\n", 1)[1].split("\n\nBased ONLY on the text", 1)[0]
+        fact = prompt.split("FACT: '", 1)[1].rsplit("'\n\nAnswer", 1)[0]
+        context_tokens = set(self.tokenize(context))
+        return "YES" if all(t in context_tokens for t in self.tokenize(str(self.values[fact]))) else "NO"
+
+@pytest.mark.parametrize("case_path", STORED_CASES, ids=lambda p: p.stem)
+def test_trimmed_verdicts_match_full_context_on_stored_cases(case_path, monkeypatch):
+    monkeypatch.chdir(REPO_ROOT)  # prompts/ is loaded relative to the repo root
+    monkeypatch.setattr(core.story_generator.time, "sleep", lambda seconds: None)
+    case = json.loads(case_path.read_text(encoding="utf-8"))
+    story = case["generated_data"]["narrative"]
+    facts = collect_facts(case["input_data"]["symbolic_reasoning_tree"]["root"])
+    values = {f"{fact['description']}: {fact['value']}": fact["value"] for fact in facts}
+
+    llm = ValueOracleLLM(values)
+    generator = StoryGenerator(llm)
+    missing_trimmed = generator._validate_fact_recall(story, list(values))
+    missing_full = [fact for fact in values if "no" in generator.llm_api.generate(
+        f"STORY:\n{story}\n\nBased ONLY on the text ... FACT: '{fact}'\n\nAnswer"
+    ).lower()]
+
+    assert missing_trimmed == missing_full
+    stats = generator.recall_stats
+    assert stats["facts_checked"] == len(values)
+    assert stats["story_tokens_full"] == len(values) * estimate_tokens(story)
+    assert stats["prompt_tokens_saved"] > 0
@@ -0,0 +1,16 @@
+import json
+from core.data_structures import ReasoningTree, ReasoningTreeNode
+from utils.file_handler import save_case_to_json
+
+def test_recall_stats_are_saved_with_the_case(tmp_path):
+    stats = {"facts_checked": 3, "full_story_fallbacks": 1, "story_tokens_full": 300,
+             "story_tokens_sent": 120, "prompt_tokens_saved": 180}
+    path = save_case_to_json("employee_commuter_case", ReasoningTree(ReasoningTreeNode("root")), "story",
+                             1000.0, 200.0, output_dir=str(tmp_path), recall_stats=stats)
+    saved = json.loads(path.read_text(encoding="utf-8"))
+    assert saved["generated_data"]["fact_recall_stats"] == stats
+
+def test_recall_stats_are_optional(tmp_path):
+    path = save_case_to_json("employee_commuter_case", ReasoningTree(ReasoningTreeNode("root")), "story",
+                             1000.0, 200.0, output_dir=str(tmp_path))
+    assert "fact_recall_stats" not in json.loads(path.read_text(encoding="utf-8"))["generated_data"]
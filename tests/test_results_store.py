@@ -0,0 +1,130 @@
+import pytest
+from utils.results_store import ResultsStore, hash_prompt_template, template_from_case_id
+
+KEY = ("employee_commuter_case_20250924_221843", "model-a", "abc123", 0.7, 1024)
+
+def make_result(parsed: float | None, ground_truth: float = 1000.0) -> dict:
+    return {
+        "model_reasoning": "reasoning",
+        "parsed_answer_eur": parsed,
+        "ground_truth_answer_eur": ground_truth,
+        "is_correct": parsed is not None and abs(parsed - ground_truth) < 0.01
+    }
+
+@pytest.fixture
+def store(tmp_path):
+    store = ResultsStore(str(tmp_path / "results.db"))
+    yield store
+    store.close()
+
+def test_get_returns_none_for_unscored_key(store):
+    assert store.get(*KEY) is None
+
+def test_save_and_get_round_trip(store):
+    result = make_result(1000.0)
+    store.save(*KEY, result, ["Total Commute Deduction"])
+    assert store.get(*KEY) == result
+
+def test_results_persist_across_connections(tmp_path):
+    db_path = str(tmp_path / "results.db")
+    first = ResultsStore(db_path)
+    first.save(*KEY, make_result(1000.0), [])
+    first.close()
+    second = ResultsStore(db_path)
+    assert second.get(*KEY)["is_correct"] is True
+    second.close()
+
+@pytest.mark.parametrize("index, changed", [(3, 0.0), (4, 2048)])
+def test_key_includes_sampling_settings(store, index, changed):
+    store.save(*KEY, make_result(1000.0), [])
+    other_key = KEY[:index] + (changed,) + KEY[index + 1:]
+    assert store.get(*other_key) is None
+    store.save(*other_key, make_result(5.0), [])
+    assert store.get(*KEY)["is_correct"] is True
+    assert store.get(*other_key)["is_correct"] is False
+
+def test_saving_same_key_replaces_result(store):
+    store.save(*KEY, make_result(5.0), [])
+    store.save(*KEY, make_result(1000.0), [])
+    assert store.get(*KEY)["is_correct"] is True
+    assert store.accuracy_by("model") == [{"model": "model-a", "n": 1, "accuracy": 1.0}]
+
+@pytest.mark.parametrize("columns", [(), ("case_id",), ("model", "is_correct; DROP TABLE evaluations")])
+def test_accuracy_by_rejects_columns_outside_whitelist(store, columns):
+    with pytest.raises(ValueError):
+        store.accuracy_by(*columns)
+
+def test_accuracy_by_template_and_model(store):
+    store.save("combined_freelancer_case_20250101_000000", "model-a", "h", 0.7, 1024, make_result(1000.0), [])
+    store.save("combined_freelancer_case_20250102_000000", "model-a", "h", 0.7, 1024, make_result(0.0), [])
+    store.save("combined_freelancer_case_20250101_000000", "model-b", "h", 0.7, 1024, make_result(1000.0), [])
+    assert store.accuracy_by("template", "model") == [
+        {"template": "combined_freelancer_case", "model": "model-a", "n": 2, "accuracy": 0.5},
+        {"template": "combined_freelancer_case", "model": "model-b", "n": 1, "accuracy": 1.0},
+    ]
+
+def test_abs_error_distribution_orders_buckets_and_separates_unparsed(store):
+    for i, parsed in enumerate([1000.0, 1005.0, 1500.0, 20000.0, None, None]):
+        store.save(f"case_{i}_20250101_000000", "model-a", "h", 0.7, 1024, make_result(parsed), [])
+    store.save("case_9_20250101_000000", "model-b", "h", 0.7, 1024, make_result(1000.5), [])
+
+    assert store.abs_error_distribution() == [
+        {"bucket": "[0, 0.01)", "n": 1},
+        {"bucket": "[0.01, 1)", "n": 1},
+        {"bucket": "[1, 10)", "n": 1},
+        {"bucket": "[100, 1000)", "n": 1},
+        {"bucket": ">= 10000", "n": 1},
+        {"bucket": "unparsed", "n": 2},
+    ]
+    assert store.abs_error_distribution(model="model-b") == [{"bucket": "[0.01, 1)", "n": 1}]
+
+def test_accuracy_by_deduction_type_joins_cases_to_evaluations(store):
+    store.save("a_20250101_000000", "model-a", "h", 0.7, 1024, make_result(1000.0), ["Home Office", "Donation"])
+    store.save("b_20250101_000000", "model-a", "h", 0.7, 1024, make_result(0.0), ["Donation"])
+    store.save("a_20250101_000000", "model-b", "h", 0.7, 1024, make_result(0.0), ["Home Office", "Donation"])
+
+    assert store.accuracy_by_deduction_type() == [
+        {"deduction_type": "Donation", "model": "model-a", "n": 2, "accuracy": 0.5},
+        {"deduction_type": "Donation", "model": "model-b", "n": 1, "accuracy": 0.0},
+        {"deduction_type": "Home Office", "model": "model-a", "n": 1, "accuracy": 1.0},
+        {"deduction_type": "Home Office", "model": "model-b", "n": 1, "accuracy": 0.0},
+    ]
+    assert store.accuracy_by_deduction_type(model="model-b") == [
+        {"deduction_type": "Donation", "model": "model-b", "n": 1, "accuracy": 0.0},
+        {"deduction_type": "Home Office", "model": "model-b", "n": 1, "accuracy": 0.0},
+    ]
+
+def query_plan(store: ResultsStore, sql: str, params: tuple) -> list:
+    return [row["detail"] for row in store.conn.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+
+def test_model_filtered_aggregates_search_the_model_index(store):
+    abs_error_plan = query_plan(store, *store._abs_error_sql((1, 10), "model-a"))
+    assert any(d.startswith("SEARCH evaluations USING INDEX idx_evaluations_model") for d in abs_error_plan)
+    deduction_plan = query_plan(store, *store._deduction_type_sql("model-a"))
+    assert any(d.startswith("SEARCH e USING INDEX idx_evaluations_model") for d in deduction_plan)
+
+@pytest.mark.parametrize("columns, index", [
+    (("model",), "idx_evaluations_model"),
+    (("template", "model"), "idx_evaluations_template_model"),
+    (("prompt_hash", "model"), "idx_evaluations_prompt_model"),
+])
+def test_report_groupings_read_a_covering_index_in_group_order(store, columns, index):
+    plan = query_plan(store, *store._accuracy_by_sql(*columns))
+    assert any(f"COVERING INDEX {index}" in d for d in plan)
+    assert not any("TEMP B-TREE" in d for d in plan)
+
+def test_old_prompt_index_is_replaced(tmp_path):
+    db_path = str(tmp_path / "results.db")
+    ResultsStore(db_path).close()
+    store = ResultsStore(db_path)
+    store.conn.execute("CREATE INDEX idx_evaluations_prompt ON evaluations (prompt_hash, is_correct)")
+    store.close()
+    store = ResultsStore(db_path)
+    indexes = {row["name"] for row in store.conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    assert "idx_evaluations_prompt" not in indexes and "idx_evaluations_prompt_model" in indexes
+    store.close()
+
+def test_helpers():
+    assert template_from_case_id("extraordinary_burdens_medical_20250924_222019") == "extraordinary_burdens_medical"
+    assert hash_prompt_template("a", "b") == hash_prompt_template("a", "b")
+    assert hash_prompt_template("a", "b") != hash_prompt_template("ab")
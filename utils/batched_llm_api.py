@@ -0,0 +1,167 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+import httpx
+import yaml
+from utils.llm_api import GENERATION_ERROR_PREFIX
+
+class BatchedLLM_API:
+    """
+    A drop-in replacement for LLM_API that talks to a self-hosted, OpenAI-compatible
+    server (llama.cpp, vLLM). Requests from every stage and case share one pooled set of
+    keep-alive connections and are coalesced into micro-batches, so the server can batch them.
+    """
+    def __init__(self, config_path: str = "configs/config.yaml"):
+        with open(config_path, 'r') as f:
+            config = yaml.safe_load(f)
+        local = config['llm'].get('local') or {}
+        self.base_url = local.get('base_url', "http://localhost:8000/v1").rstrip('/')
+        self.model = local.get('model') or config['llm']['model']
+        self.temperature = config['llm']['temperature']
+        self.max_tokens = local.get('max_tokens') or config['llm']['max_tokens']
+        self.max_batch_size = local.get('max_batch_size', 8)
+        self.max_wait_s = local.get('max_wait_ms', 20) / 1000.0
+        # Callers may issue this many requests at once; they are coalesced into one batch.
+        self.concurrent_requests = self.max_batch_size
+
+        headers = {"Authorization": f"Bearer {local['api_key']}"} if local.get('api_key') else {}
+        self.client = httpx.Client(
+            base_url=self.base_url,
+            headers=headers,
+            timeout=local.get('timeout_s', 600),
+            limits=httpx.Limits(
+                max_connections=self.max_batch_size,
+                max_keepalive_connections=self.max_batch_size
+            )
+        )
+        self._executor = ThreadPoolExecutor(max_workers=self.max_batch_size)
+        self._queue = queue.Queue()
+        self._state_lock = threading.Lock()
+        self._in_flight = 0
+        self._stats_lock = threading.Lock()
+        self._latencies = []
+        self._batch_sizes = []
+        self._closed = False
+        self._dispatcher = threading.Thread(target=self._dispatch_loop, daemon=True)
+        self._dispatcher.start()
+
+    def generate(self, prompt: str, system_prompt: str = "You are an expert financial storyteller.") -> str:
+        """Queues a chat request for the next micro-batch and blocks until its answer arrives."""
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": prompt}
+        ]
+        future = Future()
+        with self._state_lock:
+            if self._closed:
+                future.set_exception(RuntimeError("BatchedLLM_API has been closed."))
+            else:
+                self._queue.put((messages, future, time.perf_counter()))
+        try:
+            return future.result()
+        except Exception as e:
+            print(f"Error calling local LLM server: {e}")
+            return f"{GENERATION_ERROR_PREFIX} Details: {e}"
+
+    def stats(self) -> dict:
+        """Returns per-request latency and batch-size statistics collected so far."""
+        with self._stats_lock:
+            latencies = sorted(self._latencies)
+            batch_sizes = list(self._batch_sizes)
+
+        def percentile(p: float) -> float | None:
+            if not latencies:
+                return None
+            return latencies[min(len(latencies) - 1, int(p * len(latencies)))]
+
+        return {
+            "requests": len(latencies),
+            "batches": len(batch_sizes),
+            "mean_batch_size": sum(batch_sizes) / len(batch_sizes) if batch_sizes else None,
+            "largest_batch": max(batch_sizes, default=None),
+            "mean_latency_s": sum(latencies) / len(latencies) if latencies else None,
+            "p50_latency_s": percentile(0.50),
+            "p95_latency_s": percentile(0.95),
+            "max_latency_s": latencies[-1] if latencies else None
+        }
+
+    def close(self):
+        """Stops the dispatcher, waits for in-flight requests and releases pooled connections."""
+        with self._state_lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(None)
+        self._dispatcher.join()
+        # Anything queued behind the stop marker will never be dispatched.
+        while not self._queue.empty():
+            item = self._queue.get_nowait()
+            if item is not None:
+                item[1].set_exception(RuntimeError("BatchedLLM_API was closed before the request was sent."))
+        self._executor.shutdown(wait=True)
+        self.client.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _dispatch_loop(self):
+        """
+        Collects queued requests until the batch is full or the wait window expires.
+        A lone request with nothing else in flight is sent immediately, so sequential
+        callers never pay the wait window.
+        """
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            batch = [item]
+            with self._state_lock:
+                idle = self._in_flight == 0
+            deadline = time.perf_counter() + (0 if idle and self._queue.empty() else self.max_wait_s)
+            stop = False
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+
+            with self._stats_lock:
+                self._batch_sizes.append(len(batch))
+            with self._state_lock:
+                self._in_flight += len(batch)
+            for messages, future, enqueued_at in batch:
+                self._executor.submit(self._complete, messages, future, enqueued_at)
+            if stop:
+                return
+
+    def _complete(self, messages: list, future: Future, enqueued_at: float):
+        """Sends a single chat completion over the shared connection pool."""
+        try:
+            response = self.client.post("/chat/completions", json={
+                "model": self.model,
+                "messages": messages,
+                "temperature": self.temperature,
+                "max_tokens": self.max_tokens
+            })
+            response.raise_for_status()
+            content = response.json()["choices"][0]["message"]["content"].strip()
+        except Exception as e:
+            future.set_exception(e)
+            return
+        finally:
+            with self._stats_lock:
+                self._latencies.append(time.perf_counter() - enqueued_at)
+            with self._state_lock:
+                self._in_flight -= 1
+        future.set_result(content)
@@ -9,10 +9,12 @@ def save_case_to_json(
     story: str,
     taxable_income: float,
     total_deductions: float,
-    output_dir: str = "output"
+    output_dir: str = "output",
+    recall_stats: dict | None = None
 ) -> Path | None:
     """
     Saves the complete generated case to a structured JSON file.
+    If given, the fact-recall statistics (prompt tokens saved by retrieval) are stored alongside the narrative.
     """
     output_path = Path(output_dir)
     output_path.mkdir(exist_ok=True)
@@ -38,6 +40,8 @@ def save_case_to_json(
             }
         }
     }
+    if recall_stats:
+        output_data["generated_data"]["fact_recall_stats"] = recall_stats
 
     try:
         with open(filename, 'w', encoding='utf-8') as f:
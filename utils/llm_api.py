@@ -2,8 +2,14 @@ import os
 import yaml
 from groq import Groq
 
+# Prefix of the string returned by generate() when the model could not be called.
+GENERATION_ERROR_PREFIX = "Error: Could not generate content."
+
 class LLM_API:
     """A wrapper for the Groq API to use open-source language models."""
+    # Groq is rate limited, so callers should send one request at a time.
+    concurrent_requests = 1
+
     def __init__(self, config_path: str = "configs/config.yaml"):
         with open(config_path, 'r') as f:
             config = yaml.safe_load(f)
@@ -30,4 +36,23 @@ class LLM_API:
             return chat_completion.choices[0].message.content.strip()
         except Exception as e:
             print(f"Error calling Groq API: {e}")
-            return f"Error: Could not generate content. Details: {e}"
\ No newline at end of file
+            return f"{GENERATION_ERROR_PREFIX} Details: {e}"
+
+    def stats(self) -> dict | None:
+        """The hosted backend does not collect request statistics."""
+        return None
+
+    def close(self):
+        self.client.close()
+
+def create_llm_api(config_path: str = "configs/config.yaml"):
+    """Builds the LLM client selected by `llm.backend` in the config ('groq' or 'local')."""
+    with open(config_path, 'r') as f:
+        config = yaml.safe_load(f)
+    backend = config['llm'].get('backend', 'groq')
+    if backend == 'groq':
+        return LLM_API(config_path)
+    if backend == 'local':
+        from utils.batched_llm_api import BatchedLLM_API
+        return BatchedLLM_API(config_path)
+    raise ValueError(f"Unknown LLM backend '{backend}'. Expected 'groq' or 'local'.")
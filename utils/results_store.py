@@ -0,0 +1,147 @@
+import hashlib
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS evaluations (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    case_id TEXT NOT NULL,
+    template TEXT NOT NULL,
+    model TEXT NOT NULL,
+    prompt_hash TEXT NOT NULL,
+    temperature REAL NOT NULL,
+    max_tokens INTEGER NOT NULL,
+    ground_truth_answer_eur REAL NOT NULL,
+    parsed_answer_eur REAL,
+    abs_error_eur REAL,
+    is_correct INTEGER NOT NULL,
+    model_reasoning TEXT,
+    created_at TEXT NOT NULL,
+    UNIQUE (case_id, model, prompt_hash, temperature, max_tokens)
+);
+CREATE INDEX IF NOT EXISTS idx_evaluations_model ON evaluations (model, is_correct);
+CREATE INDEX IF NOT EXISTS idx_evaluations_template ON evaluations (template, is_correct);
+CREATE INDEX IF NOT EXISTS idx_evaluations_template_model ON evaluations (template, model, is_correct);
+DROP INDEX IF EXISTS idx_evaluations_prompt;
+CREATE INDEX IF NOT EXISTS idx_evaluations_prompt_model ON evaluations (prompt_hash, model, is_correct);
+CREATE INDEX IF NOT EXISTS idx_evaluations_abs_error ON evaluations (abs_error_eur);
+
+CREATE TABLE IF NOT EXISTS case_deductions (
+    case_id TEXT NOT NULL,
+    deduction_type TEXT NOT NULL,
+    PRIMARY KEY (case_id, deduction_type)
+);
+CREATE INDEX IF NOT EXISTS idx_case_deductions_type ON case_deductions (deduction_type, case_id);
+"""
+
+# Columns that accuracy may be grouped by; used to whitelist the GROUP BY clause.
+GROUPABLE_COLUMNS = ("template", "model", "prompt_hash", "temperature", "max_tokens")
+
+def hash_prompt_template(*parts: str) -> str:
+    """Returns a short, stable hash identifying a prompt template (and its system prompt)."""
+    return hashlib.sha256("\x00".join(parts).encode('utf-8')).hexdigest()[:16]
+
+def template_from_case_id(case_id: str) -> str:
+    """Case ids are '<template>_<YYYYmmdd>_<HHMMSS>'; strips the timestamp."""
+    return case_id.rsplit('_', 2)[0]
+
+class ResultsStore:
+    """
+    A SQLite store for evaluation results, keyed by case id, model, prompt-template hash
+    and sampling settings, so already-scored (case, model) pairs are never re-evaluated.
+    """
+    def __init__(self, db_path: str = "output/results.db"):
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        # Cases may be evaluated from several threads; a lock serializes access to the connection.
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    def get(self, case_id: str, model: str, prompt_hash: str, temperature: float, max_tokens: int) -> dict | None:
+        """Returns the stored result for this key, or None if it has not been scored yet."""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT model_reasoning, parsed_answer_eur, ground_truth_answer_eur, is_correct "
+                "FROM evaluations WHERE case_id = ? AND model = ? AND prompt_hash = ? "
+                "AND temperature = ? AND max_tokens = ?",
+                (case_id, model, prompt_hash, temperature, max_tokens)
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            "model_reasoning": row["model_reasoning"],
+            "parsed_answer_eur": row["parsed_answer_eur"],
+            "ground_truth_answer_eur": row["ground_truth_answer_eur"],
+            "is_correct": bool(row["is_correct"])
+        }
+
+    def save(self, case_id: str, model: str, prompt_hash: str, temperature: float, max_tokens: int,
+             result: dict, deduction_types: list):
+        """Stores an evaluation result together with the deduction types present in the case."""
+        parsed = result["parsed_answer_eur"]
+        ground_truth = result["ground_truth_answer_eur"]
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO evaluations (case_id, template, model, prompt_hash, temperature, "
+                "max_tokens, ground_truth_answer_eur, parsed_answer_eur, abs_error_eur, is_correct, "
+                "model_reasoning, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (case_id, template_from_case_id(case_id), model, prompt_hash, temperature, max_tokens,
+                 ground_truth, parsed, abs(parsed - ground_truth) if parsed is not None else None,
+                 int(result["is_correct"]), result["model_reasoning"], datetime.now().isoformat())
+            )
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO case_deductions (case_id, deduction_type) VALUES (?, ?)",
+                [(case_id, deduction_type) for deduction_type in deduction_types]
+            )
+
+    def accuracy_by(self, *columns: str) -> list:
+        """Aggregates accuracy grouped by any of GROUPABLE_COLUMNS (e.g. 'model', 'template')."""
+        return [dict(row) for row in self._query(*self._accuracy_by_sql(*columns))]
+
+    def accuracy_by_deduction_type(self, model: str | None = None) -> list:
+        """Aggregates accuracy over all cases that contain each deduction type."""
+        return [dict(row) for row in self._query(*self._deduction_type_sql(model))]
+
+    def abs_error_distribution(self, bin_edges: tuple = (0.01, 1, 10, 100, 1000, 10000), model: str | None = None) -> list:
+        """
+        Counts results per absolute-error bucket against the ground truth.
+        Unparseable answers are reported in their own bucket.
+        """
+        rows = self._query(*self._abs_error_sql(bin_edges, model))
+        return [{"bucket": row["bucket"], "n": row["n"]} for row in rows]
+
+    def _query(self, sql: str, params: tuple) -> list:
+        with self._lock:
+            return self.conn.execute(sql, params).fetchall()
+
+    def _accuracy_by_sql(self, *columns: str) -> tuple[str, tuple]:
+        unknown = [c for c in columns if c not in GROUPABLE_COLUMNS]
+        if not columns or unknown:
+            raise ValueError(f"Cannot group by {unknown or columns}. Choose from {GROUPABLE_COLUMNS}.")
+        group = ", ".join(columns)
+        return (f"SELECT {group}, COUNT(*) AS n, AVG(is_correct) AS accuracy "
+                f"FROM evaluations GROUP BY {group} ORDER BY {group}"), ()
+
+    def _deduction_type_sql(self, model: str | None) -> tuple[str, tuple]:
+        # The model filter is only added when given, so SQLite can use idx_evaluations_model.
+        where, params = ("WHERE e.model = ? ", (model,)) if model is not None else ("", ())
+        return ("SELECT d.deduction_type, e.model, COUNT(*) AS n, AVG(e.is_correct) AS accuracy "
+                "FROM case_deductions d JOIN evaluations e ON e.case_id = d.case_id "
+                f"{where}GROUP BY d.deduction_type, e.model ORDER BY d.deduction_type, e.model"), params
+
+    def _abs_error_sql(self, bin_edges: tuple, model: str | None) -> tuple[str, tuple]:
+        cases = ["WHEN abs_error_eur IS NULL THEN 'unparsed'"]
+        lower = 0
+        for edge in bin_edges:
+            cases.append(f"WHEN abs_error_eur < {float(edge)} THEN '[{lower}, {edge})'")
+            lower = edge
+        cases.append(f"ELSE '>= {lower}'")
+        where, params = ("WHERE model = ? ", (model,)) if model is not None else ("", ())
+        return (f"SELECT CASE {' '.join(cases)} END AS bucket, COUNT(*) AS n, MIN(abs_error_eur) AS lower_bound "
+                f"FROM evaluations {where}GROUP BY bucket ORDER BY lower_bound IS NULL, lower_bound"), params
+
+    def close(self):
+        self.conn.close()